@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from vision_utils import dhash, estimate_distances, overlap_keep_mask, pairwise_iou
+
+
+def iou(boxA, boxB):
+    """Original scalar IoU, kept here as the reference implementation."""
+    xA = max(boxA[0], boxB[0])
+    yA = max(boxA[1], boxB[1])
+    xB = min(boxA[2], boxB[2])
+    yB = min(boxA[3], boxB[3])
+
+    interArea = max(0, xB - xA) * max(0, yB - yA)
+    if interArea == 0:
+        return 0.0
+
+    boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
+    boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
+
+    return interArea / float(boxAArea + boxBArea - interArea)
+
+
+def remove_overlapping_objects(objects):
+    """Original O(N^2) double loop, kept here as the reference implementation."""
+    filtered_objects = []
+    for obj in objects:
+        keep = True
+        for f in filtered_objects:
+            if obj["label"] == f["label"] and iou(obj["bbox"], f["bbox"]) > 0.5:
+                keep = False
+                break
+        if keep:
+            filtered_objects.append(obj)
+    return filtered_objects
+
+
+def reference_distance(bbox, real_w_cm, focal_length_px, height_px):
+    """Original per-object distance formula."""
+    x1, y1, x2, y2 = bbox
+    bbox_w = max(1, x2 - x1)
+    bbox_h = max(1, y2 - y1)
+    if real_w_cm is not None:
+        return round((real_w_cm * focal_length_px) / float(bbox_w), 1)
+    proxy = 1.0 / (bbox_h / height_px + 0.1) * 3.0
+    return round(proxy * 100.0, 1)
+
+
+def random_objects(rng, n, labels=("person", "chair", "cup")):
+    objects = []
+    for _ in range(n):
+        x1, y1 = rng.integers(0, 600, size=2)
+        w, h = rng.integers(1, 200, size=2)
+        objects.append({"label": str(rng.choice(labels)), "bbox": [int(x1), int(y1), int(x1 + w), int(y1 + h)]})
+    return objects
+
+
+def test_pairwise_iou_matches_scalar_iou():
+    rng = np.random.default_rng(0)
+    objects = random_objects(rng, 30)
+    boxes = np.asarray([o["bbox"] for o in objects], dtype=np.float64)
+    matrix = pairwise_iou(boxes)
+    for i, a in enumerate(objects):
+        for j, b in enumerate(objects):
+            assert matrix[i, j] == pytest.approx(iou(a["bbox"], b["bbox"]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_overlap_keep_mask_matches_original_double_loop(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct positions so plenty of boxes overlap
+    objects = random_objects(rng, 40)
+    for o in objects[::2]:
+        base = objects[0]["bbox"]
+        o["bbox"] = [v + int(rng.integers(-10, 10)) for v in base]
+
+    expected = remove_overlapping_objects(objects)
+    keep = overlap_keep_mask([o["bbox"] for o in objects], [o["label"] for o in objects])
+    assert [o for o, k in zip(objects, keep) if k] == expected
+
+
+def test_overlap_keep_mask_handles_empty_and_single():
+    assert overlap_keep_mask(np.zeros((0, 4)), np.zeros(0, dtype=np.int32)).tolist() == []
+    assert overlap_keep_mask([[0, 0, 10, 10]], [3]).tolist() == [True]
+
+
+def test_estimate_distances_matches_original_formula():
+    rng = np.random.default_rng(1)
+    objects = random_objects(rng, 200)
+    widths = [float(rng.choice([np.nan, 7.0, 24.0, 50.0])) for _ in objects]
+    focal_length_px, height_px = 850.0, 480
+
+    distances = estimate_distances(
+        [o["bbox"] for o in objects], np.asarray(widths), focal_length_px, height_px
+    )
+
+    expected = [
+        reference_distance(o["bbox"], None if np.isnan(w) else w, focal_length_px, height_px)
+        for o, w in zip(objects, widths)
+    ]
+    assert distances.tolist() == pytest.approx(expected, abs=1e-9)
+
+
+def test_estimate_distances_empty():
+    assert estimate_distances(np.zeros((0, 4)), np.zeros(0), 850.0, 480).tolist() == []
+
+
+def test_dhash_tolerates_noise_but_not_different_content():
+    rng = np.random.default_rng(2)
+    img = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    noisy = np.clip(img.astype(np.int16) + rng.integers(-2, 3, size=img.shape), 0, 255).astype(np.uint8)
+    other = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+
+    h = dhash(img)
+    assert 0 <= h < 2 ** 64
+    assert bin(h ^ dhash(noisy)).count("1") <= 5
+    assert bin(h ^ dhash(other)).count("1") > 5
+    assert dhash(img, 16) < 2 ** 256
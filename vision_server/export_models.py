@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+"""
+Export YOLO for this machine ahead of time (TensorRT on CUDA, INT8 OpenVINO on CPU).
+Run this once: python export_models.py
+
+The server does the same export on first start if it is missing, but doing it
+here keeps the slow step (and the coco128 download used for INT8 calibration)
+out of server startup.
+"""
+
+from vision_processor import VisionProcessor
+
+exported = VisionProcessor.export_yolo()
+if exported:
+    print(f"✓ YOLO exported: {exported}")
+else:
+    print("No export backend available (tensorrt/openvino); the server will use the PyTorch weights.")
@@ -1,18 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from vision_processor import VisionProcessor  # Your vision class
-from io import BytesIO
-from PIL import Image
+import numpy as np
+import cv2
+import torch
 import os
+import asyncio
 import socket
+import importlib.util
+import subprocess
+import sys
+import threading
 
 # ------------------------------
 # 1. Initialize FastAPI app
 # ------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Load and warm up the models in each worker before it accepts requests.
+    The warm-up is the worker's first inference, so a worker that cannot run
+    inference after the fork fails here instead of on a user's request.
+    """
+    processor = await asyncio.to_thread(get_vision_processor)
+    yield
+    processor.shutdown()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # ------------------------------
 # 2. CORS FIX — VERY IMPORTANT
@@ -37,28 +55,89 @@ parent_dir = os.path.dirname(current_dir)
 # Mount static files from parent directory
 app.mount("/static", StaticFiles(directory=parent_dir), name="static")
 
-# Serve index.html at root
-@app.get("/")
-async def serve_index():
-    """Serve index.html at the root path."""
-    index_path = os.path.join(parent_dir, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path, media_type="text/html")
-    return JSONResponse({"error": "index.html not found"}, status_code=404)
+# index.html is read once at startup and served from memory
+INDEX_PATH = os.path.join(parent_dir, "index.html")
+index_bytes = None
+if os.path.exists(INDEX_PATH):
+    with open(INDEX_PATH, "rb") as f:
+        index_bytes = f.read()
 
-# Serve index.html at /index.html
+# Serve index.html at / and /index.html
+@app.get("/")
 @app.get("/index.html")
-async def serve_index_explicit():
-    """Serve index.html explicitly."""
-    index_path = os.path.join(parent_dir, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path, media_type="text/html")
-    return JSONResponse({"error": "index.html not found"}, status_code=404)
+async def serve_index():
+    """Serve the cached index.html."""
+    if index_bytes is not None:
+        return Response(content=index_bytes, media_type="text/html")
+    return ORJSONResponse({"error": "index.html not found"}, status_code=404)
 
 # ------------------------------
-# 4. Initialize Vision Processor
+# 4. Initialize Vision Processor (lazily, once per worker process)
 # ------------------------------
-vp = VisionProcessor()
+# Created on first use so forked Gunicorn workers each load their own
+# models after the fork instead of inheriting a half-initialized GPU context.
+# With VISION_PRELOAD=1 (CPU-only, set when launched via Gunicorn --preload)
+# only the EasyOCR reader is loaded in the master, single-threaded so no torch
+# thread pool exists at fork time; the workers share its weights copy-on-write.
+# YOLO is always loaded in the worker: an OpenVINO model starts its executor
+# threads when compiled, and its weights are mmapped (shared via the page cache) anyway.
+PRELOAD = os.environ.get("VISION_PRELOAD") == "1"
+# Per-worker CPU thread budget, set by the Gunicorn launcher below
+NUM_THREADS = int(os.environ["VISION_THREADS"]) if os.environ.get("VISION_THREADS") else None
+preloaded_ocr = None
+if PRELOAD:
+    torch.set_num_threads(1)
+    preloaded_ocr = VisionProcessor.load_ocr(use_cuda=False)
+vp = None
+
+def get_vision_processor():
+    global vp
+    if vp is None:
+        vp = VisionProcessor(ocr=preloaded_ocr, num_threads=NUM_THREADS)
+    return vp
+
+# Reusable per-worker upload buffer, guarded by upload_lock. Small uploads are
+# still in memory and are read and decoded on the event loop; uploads Starlette
+# has spooled to disk are read and decoded in a worker thread instead.
+UPLOAD_BUF_SIZE = 4 * 1024 * 1024
+upload_buf = bytearray(UPLOAD_BUF_SIZE)
+upload_lock = threading.Lock()
+
+def decode_upload(f):
+    """
+    Read an upload file object into the reusable buffer and decode it to BGR.
+    Falls back to a fresh bytes object for files larger than the buffer.
+    Callers must hold upload_lock.
+    """
+    f.seek(0)
+    if not hasattr(f, "readinto"):
+        data = np.frombuffer(f.read(), dtype=np.uint8)
+    else:
+        n = f.readinto(upload_buf)
+        if n < UPLOAD_BUF_SIZE:
+            data = np.frombuffer(upload_buf, dtype=np.uint8, count=n)
+        else:
+            data = np.frombuffer(bytes(upload_buf) + f.read(), dtype=np.uint8)
+    # Decode straight to an OpenCV BGR array (no PIL round-trip)
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+def decode_upload_locked(f):
+    with upload_lock:
+        return decode_upload(f)
+
+async def read_image(file: UploadFile):
+    """Read and decode an uploaded image without blocking the event loop on disk reads."""
+    f = file.file
+    if not getattr(file, "_in_memory", False):
+        return await asyncio.to_thread(decode_upload_locked, f)
+    if upload_lock.acquire(blocking=False):
+        try:
+            return decode_upload(f)
+        finally:
+            upload_lock.release()
+    # Buffer busy with a spooled upload; copying a small in-memory file beats waiting
+    f.seek(0)
+    return cv2.imdecode(np.frombuffer(f.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
 
 # ------------------------------
 # 5. API Endpoint
@@ -70,21 +149,21 @@ async def analyze_frame(file: UploadFile = File(...)):
     and returns structured JSON data.
     """
     try:
-        # Read image bytes
-        contents = await file.read()
-
-        # Load with PIL
-        img = Image.open(BytesIO(contents)).convert("RGB")
+        # Read image bytes into the reusable buffer and decode them
+        img = await read_image(file)
+        if img is None:
+            return ORJSONResponse({"error": "Could not decode image"}, status_code=400)
 
         # Process with vision models
-        results = vp.process_pil(img)
+        results = await get_vision_processor().process_bgr(img)
 
-        # Return JSON back to client/browser
-        return JSONResponse(results)
+        # Return JSON back to client/browser; returning the response directly
+        # skips FastAPI's jsonable_encoder pass over the payload
+        return ORJSONResponse(results)
 
     except Exception as e:
         print(f"[ERROR] Frame processing failed: {e}")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
 # ------------------------------
@@ -125,7 +204,40 @@ if __name__ == "__main__":
         print("  Click 'Advanced' and 'Proceed' to continue")
     
     print("Make sure your app/browser is on the same network.")
-    
+
+    # Multiple worker processes via Gunicorn when available (not supported on Windows).
+    # On CUDA default to one process: N workers would each put the full model set
+    # on the same GPU, and batching only works within a process.
+    use_cuda = torch.cuda.is_available()
+    cpu_count = os.cpu_count() or 1
+    workers = int(os.environ.get("VISION_WORKERS", 1 if use_cuda else cpu_count))
+    if workers > 1 and sys.platform != "win32" and importlib.util.find_spec("gunicorn"):
+        # Export once here, so workers don't all export to the same path at startup.
+        # Run from the same directory the workers use (--chdir below), so any
+        # cwd-relative output (datasets, exports) is found again by the workers.
+        os.chdir(current_dir)
+        VisionProcessor.export_yolo(use_cuda=use_cuda)
+
+        print(f"Starting Gunicorn with {workers} Uvicorn workers")
+        cmd = [
+            sys.executable, "-m", "gunicorn", "main:app",
+            "-k", "uvicorn.workers.UvicornWorker",
+            "-w", str(workers),
+            "-b", f"0.0.0.0:{port}",
+            "--chdir", current_dir,
+            # Workers only heartbeat after startup, which loads and warms the models
+            "--timeout", os.environ.get("VISION_WORKER_TIMEOUT", "600"),
+        ]
+        if use_https:
+            cmd += ["--keyfile", key_file, "--certfile", cert_file]
+        env = dict(os.environ)
+        env.setdefault("VISION_THREADS", str(max(1, cpu_count // workers)))
+        # CUDA contexts cannot survive fork, so only share models on CPU-only machines
+        if not use_cuda:
+            cmd.append("--preload")
+            env["VISION_PRELOAD"] = "1"
+        sys.exit(subprocess.call(cmd, env=env))
+
     if use_https:
         uvicorn.run(
             app, 
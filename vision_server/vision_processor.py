@@ -1,32 +1,46 @@
+import asyncio
+import collections
+import copy
+import importlib.util
+import os
+import threading
+import time
 import numpy as np
 from PIL import Image
 import cv2
+import torch
 from ultralytics import YOLO
 import easyocr
+from vision_utils import dhash, overlap_keep_mask, estimate_distances
 
 class VisionProcessor:
-    @staticmethod
-    def iou(boxA, boxB):
-        """
-        Compute Intersection over Union (IoU) between two bounding boxes.
-        boxA, boxB: [x1, y1, x2, y2]
-        """
-        xA = max(boxA[0], boxB[0])
-        yA = max(boxA[1], boxB[1])
-        xB = min(boxA[2], boxB[2])
-        yB = min(boxA[3], boxB[3])
+    # YOLO weights and the largest micro-batch (class-level so exports can run
+    # before any processor exists, e.g. from export_models.py). The weights path
+    # is anchored at this module so it does not depend on the working directory.
+    YOLO_WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yolov8x.pt")
+    YOLO_BATCH_SIZE = 8
 
-        interArea = max(0, xB - xA) * max(0, yB - yA)
-        if interArea == 0:
-            return 0.0
+    def __init__(self, warmup=True, ocr=None, num_threads=None):
+        print("Loading AI Models... (This may take a moment on first run)")
 
-        boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-        boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
+        # Per-process CPU thread budget; with several worker processes each one
+        # gets a share of the cores instead of all of them
+        self.num_threads = num_threads
+        if num_threads:
+            torch.set_num_threads(num_threads)
+            cv2.setNumThreads(num_threads)
 
-        return interArea / float(boxAArea + boxBArea - interArea)
+        # Run on the GPU in FP16 when CUDA is available; FP16 is not supported on CPU
+        self.use_cuda = torch.cuda.is_available()
+        self.device = "cuda:0" if self.use_cuda else "cpu"
+        self.use_half = self.use_cuda
+        if self.use_cuda:
+            # Few distinct YOLO input shapes (rect letterbox at 640): let cuDNN autotune
+            # and cache the fastest kernels for each; warmup() runs every one of them
+            torch.backends.cudnn.benchmark = True
 
-    def __init__(self):
-        print("Loading AI Models... (This may take a moment on first run)")
+        # YOLO micro-batching: how long to wait for more frames (up to YOLO_BATCH_SIZE)
+        self.YOLO_BATCH_WAIT_S = 0.005
 
 #-------------------------------------------------------        
         # 1. YOLOv8 Nano (object detection): model use
@@ -34,7 +48,7 @@ class VisionProcessor:
         # self.yolo = YOLO("yolov8n.pt")
         # self.yolo = YOLO("yolov8s.pt")
         # self.yolo = YOLO("yolov8m.pt")
-        self.yolo = YOLO("yolov8x.pt")
+        self.yolo = self._load_yolo(self.YOLO_WEIGHTS)
         # results = self.yolo.track(
         # source=0,
         # show=True,
@@ -42,8 +56,8 @@ class VisionProcessor:
         # )
 
         
-        # 2. EasyOCR (text detection)
-        self.ocr = easyocr.Reader(['en'])
+        # 2. EasyOCR (text detection); may be passed in already loaded (see load_ocr)
+        self.ocr = ocr if ocr is not None else self.load_ocr(self.use_cuda)
         
         # 3. Haar Cascade Face Detector (OpenCV)
         self.face_cascade = cv2.CascadeClassifier(
@@ -171,86 +185,472 @@ class VisionProcessor:
 # ----------------------------------------------------
         self.FOCAL_LENGTH_PX = 850.0
 
+        # Known widths indexed by YOLO class id (NaN = unknown), so the hot path needs no string lookups
+        # (YOLO.names is a property that rebuilds the dict, so read it once)
+        self._names = self.yolo.names
+        self._width_by_id = np.full(max(self._names) + 1, np.nan, dtype=np.float64)
+        for i, n in self._names.items():
+            if n in self.KNOWN_WIDTH:
+                self._width_by_id[i] = self.KNOWN_WIDTH[n]
+
+# ----------------------------------------------------
+# Frame-similarity cache: skip all models on near-duplicate frames
+# ----------------------------------------------------
+        self.FRAME_CACHE_SIZE = 32
+        self.FRAME_HASH_MAX_DIST = 5
+        # Entries expire so a slowly changing scene (e.g. an approaching obstacle)
+        # cannot keep returning the distances of the frame that created the entry
+        self.FRAME_CACHE_MAX_AGE_S = 1.0
+        self.FRAME_CACHE_MAX_HITS = 5
+        self._cache = collections.OrderedDict()
+
+        # Per-region OCR cache for text-bearing YOLO boxes, keyed by label and
+        # grid-snapped box position. An entry is reused only while its 16x16 dHash
+        # (256 bits, fine enough to tell pages apart) stays within a few bits and
+        # it is younger than OCR_REGION_MAX_AGE_S.
+        self.TEXT_LABELS = {"book", "laptop", "tv", "cell phone", "stop sign"}
+        self.OCR_REGION_CACHE_SIZE = 256
+        self.OCR_REGION_GRID_PX = 32
+        self.OCR_REGION_HASH_SIZE = 16
+        self.OCR_REGION_HASH_MAX_DIST = 8
+        self.OCR_REGION_MAX_AGE_S = 2.0
+        self._ocr_region_cache = collections.OrderedDict()
+
+# ----------------------------------------------------
+# Haar/OCR run on a copy downsampled to at most this longest edge (YOLO letterboxes itself)
+# ----------------------------------------------------
+        self.DETECT_MAX_SIDE = 720
+
+# ----------------------------------------------------
+# Reusable scratch buffer for the downsampled grayscale frame (either orientation)
+# ----------------------------------------------------
+        self._gray_buf = np.empty((self.DETECT_MAX_SIDE, self.DETECT_MAX_SIDE), np.uint8)
+        self._buf_lock = threading.Lock()
+
+        # The models are not thread-safe on their own; each one runs in at most
+        # one worker thread at a time, but the three of them overlap.
+        self._yolo_lock = threading.Lock()
+        self._ocr_lock = threading.Lock()
+
+# ----------------------------------------------------
+# YOLO micro-batching across concurrent requests
+# ----------------------------------------------------
+        self._yolo_queue = None  # created on first use, inside the running event loop
+        self._yolo_task = None
+
         print("Models loaded successfully.")
+        if warmup:
+            self.warmup()
 
-    def remove_overlapping_objects(self, objects):
+    def warmup(self, width=640, height=480):
         """
-        Remove duplicate objects that overlap significantly (IoU > 0.5) and share the same label.
+        Run each model on a synthetic frame so kernel selection/autotuning and
+        lazy initialization happen now rather than on the first real requests.
+        Calls the models directly, since the frame cache would short-circuit repeats.
         """
-        filtered_objects = []
-        for obj in objects:
-            keep = True
-            for f in filtered_objects:
-                if obj["label"] == f["label"] and self.iou(obj["bbox"], f["bbox"]) > 0.5:
-                    keep = False
-                    break
-            if keep:
-                filtered_objects.append(obj)
-        return filtered_objects
+        print("Warming up models...")
+        dummy = np.full((height, width, 3), 128, dtype=np.uint8)
+        for _ in range(2):
+            self._run_yolo([dummy])
+            self._limit_openvino_threads()
+        # A full micro-batch, so a backend that cannot take batch > 1 fails here, not under load
+        self._run_yolo([dummy] * self.YOLO_BATCH_SIZE)
+        self._compile_yolo(width, height)
+        with self._ocr_lock:
+            self.ocr.readtext(dummy, detail=0)
+        self._detect_faces(dummy, 1.0)
+
+    def shutdown(self):
+        """
+        Stop the YOLO batching task (call from the server's shutdown hook).
+        """
+        if self._yolo_task is not None:
+            self._yolo_task.cancel()
+            self._yolo_task = None
+
+    @staticmethod
+    def load_ocr(use_cuda):
+        """
+        Build the EasyOCR reader. Exposed separately so a Gunicorn master can
+        load it once before forking and share its weights with the workers.
+        """
+        return easyocr.Reader(['en'], gpu=use_cuda, cudnn_benchmark=use_cuda)
 
-    def process_pil(self, pil_img: Image.Image):
+    @classmethod
+    def export_yolo(cls, weights=None, use_cuda=None):
+        """
+        Export YOLO for the current device once and return the exported model's
+        path, or None to use the PyTorch weights. On CUDA: an FP16 TensorRT engine
+        when tensorrt is installed. On CPU-only machines: an INT8 OpenVINO model
+        when openvino is installed; INT8 calibration needs nncf and downloads the
+        coco128 dataset on the first export. Both exports use a dynamic batch so
+        micro-batches of 1..YOLO_BATCH_SIZE frames all fit.
+        """
+        weights = os.path.abspath(weights or cls.YOLO_WEIGHTS)
+        if use_cuda is None:
+            use_cuda = torch.cuda.is_available()
+
+        if use_cuda and importlib.util.find_spec("tensorrt"):
+            return cls._export_once(weights, "engine", "Exporting YOLO to TensorRT (one-time)...",
+                                    format="engine", imgsz=640, half=True,
+                                    dynamic=True, batch=cls.YOLO_BATCH_SIZE)
+
+        if not use_cuda and importlib.util.find_spec("openvino"):
+            return cls._export_once(weights, "openvino_int8",
+                                    "Exporting YOLO to INT8 OpenVINO (one-time, downloads coco128 for calibration)...",
+                                    format="openvino", int8=True, data="coco128.yaml",
+                                    dynamic=True, batch=cls.YOLO_BATCH_SIZE)
+
+        return None
+
+    @staticmethod
+    def _export_once(weights, kind, message, **export_args):
+        """
+        Run YOLO.export once. Ultralytics may write the export next to wherever it
+        resolved the .pt (e.g. its weights_dir), so the path export() returned is
+        recorded in <weights>.<kind>-export.txt and reused while it still exists.
+        """
+        record = f"{weights}.{kind}-export.txt"
+        if os.path.isfile(record):
+            with open(record) as f:
+                exported = f.read().strip()
+            if os.path.exists(exported):
+                return exported
+
+        try:
+            print(message)
+            exported = os.path.abspath(str(YOLO(weights).export(**export_args)))
+        except Exception as e:
+            print(f"[WARN] YOLO export ({kind}) failed, using PyTorch: {e}")
+            return None
+        with open(record, "w") as f:
+            f.write(exported)
+        return exported
+
+    def _load_yolo(self, weights):
+        """
+        Load the exported YOLO model for this device if there is one (see
+        export_yolo), otherwise the PyTorch weights.
+        """
+        exported = self.export_yolo(weights, self.use_cuda)
+        if exported is not None:
+            return YOLO(exported, task="detect")
+
+        yolo = YOLO(weights)
+        yolo.to(self.device)
+        yolo.fuse()
+        return yolo
+
+    def _limit_openvino_threads(self):
+        """
+        Recompile an OpenVINO YOLO backend with INFERENCE_NUM_THREADS = num_threads.
+        Ultralytics compiles it on the first prediction with no thread limit,
+        so this has to run after that.
+        """
+        backend = getattr(self.yolo.predictor, "model", None)
+        if not self.num_threads or backend is None or getattr(backend, "ov_limited", False):
+            return
+        if not all(hasattr(backend, a) for a in ("core", "ov_model", "ov_compiled_model")):
+            return
+        with self._yolo_lock:
+            backend.ov_compiled_model = backend.core.compile_model(
+                backend.ov_model, device_name="CPU",
+                config={"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": self.num_threads},
+            )
+            backend.ov_limited = True
+
+    def _yolo_warmup_batches(self, width, height):
+        """
+        The batch shapes live traffic produces: rect-letterboxed landscape and
+        portrait frames, a mixed batch (padded to 640x640), at every batch size
+        the micro-batcher can emit.
+        """
+        landscape = np.full((height, width, 3), 128, dtype=np.uint8)
+        portrait = np.full((width, height, 3), 128, dtype=np.uint8)
+        batches = []
+        for n in range(1, self.YOLO_BATCH_SIZE + 1):
+            batches.append([landscape] * n)
+            batches.append([portrait] * n)
+            if n > 1:
+                batches.append([landscape, portrait] * (n // 2) + [landscape] * (n % 2))
+        return batches
+
+    def _time_yolo(self, batches):
+        start = time.perf_counter()
+        for batch in batches:
+            self._run_yolo(batch)
+        torch.cuda.synchronize()
+        return time.perf_counter() - start
+
+    def _compile_yolo(self, width, height):
+        """
+        Compile the PyTorch YOLO graph with torch.compile on CUDA. This is done on
+        the predictor's backend after setup: compiling YOLO.model beforehand is
+        undone when the predictor fuses the model. dynamic=True covers the varying
+        letterbox shapes and batch sizes without a recompile per shape. The compiled
+        graph is kept only if it measures faster than eager on the warm-up batches.
+        """
+        backend = getattr(self.yolo.predictor, "model", None)
+        if not self.use_cuda or backend is None or not getattr(backend, "pt", False):
+            return
+
+        batches = self._yolo_warmup_batches(width, height)
+        self._time_yolo(batches)  # cuDNN autotuning for every shape first
+        eager_s = self._time_yolo(batches)
+
+        eager_model = backend.model
+        backend.model = torch.compile(eager_model, dynamic=True)
+        try:
+            self._time_yolo(batches)  # compiles
+            compiled_s = self._time_yolo(batches)
+        except Exception as e:
+            print(f"[WARN] torch.compile failed, using eager YOLO: {e}")
+            backend.model = eager_model
+            return
+
+        print(f"YOLO warm-up batches: eager {eager_s:.3f}s, torch.compile {compiled_s:.3f}s")
+        if compiled_s >= eager_s:
+            backend.model = eager_model
+
+    def _to_gray(self, img):
+        """
+        Convert BGR to grayscale into the preallocated scratch buffer when the frame fits.
+        Callers must hold self._buf_lock while the result is in use.
+        """
+        h, w = img.shape[:2]
+        if h <= self.DETECT_MAX_SIDE and w <= self.DETECT_MAX_SIDE:
+            return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self._gray_buf[:h, :w])
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    def _cache_lookup(self, h):
+        """
+        Return the cached value for the closest hash within FRAME_HASH_MAX_DIST
+        bits, or None on a miss. Entries older than FRAME_CACHE_MAX_AGE_S or
+        already served FRAME_CACHE_MAX_HITS times are dropped, forcing a fresh run.
+        """
+        now = time.monotonic()
+        for k in list(self._cache):
+            if now - self._cache[k]["time"] > self.FRAME_CACHE_MAX_AGE_S:
+                del self._cache[k]
+
+        for k in reversed(self._cache):
+            if bin(h ^ k).count("1") <= self.FRAME_HASH_MAX_DIST:
+                entry = self._cache[k]
+                entry["hits"] += 1
+                if entry["hits"] > self.FRAME_CACHE_MAX_HITS:
+                    del self._cache[k]
+                    return None
+                self._cache.move_to_end(k)
+                return entry["value"]
+        return None
+
+    def _cache_store(self, h, value):
+        self._cache[h] = {"value": copy.deepcopy(value), "time": time.monotonic(), "hits": 0}
+        self._cache.move_to_end(h)
+        while len(self._cache) > self.FRAME_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def process_pil(self, pil_img: Image.Image):
         """
         Process a PIL image: detect objects, texts, faces, and estimate distances.
         """
         # Convert PIL to OpenCV BGR
-        img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-        out = {"objects": [], "texts": [], "faces": [], "distances": {}}
+        img = cv2.cvtColor(np.asarray(pil_img), cv2.COLOR_RGB2BGR)
+        return await self.process_bgr(img)
 
-# ----------------------------------------------------
-        # --- 1) Object Detection ---
-# ----------------------------------------------------
+    async def process_bgr(self, img: np.ndarray):
+        """
+        Process an OpenCV BGR image (e.g. straight from cv2.imdecode):
+        detect objects, texts, faces, and estimate distances.
+        YOLO runs first; OCR and (fallback) Haar then run concurrently.
+        """
+        # Downsample once for OCR/Haar; YOLO keeps the original frame
+        scale = min(1.0, self.DETECT_MAX_SIDE / max(img.shape[:2]))
+        if scale < 1.0:
+            small_bgr = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small_bgr = img
+
+        # Near-duplicate frame: reuse the previous result and skip all models
+        frame_hash = dhash(small_bgr)
+        cached = self._cache_lookup(frame_hash)
+        if cached is not None:
+            return copy.deepcopy(cached)
 
-        dets = self.yolo(img, imgsz=640, verbose=False)[0]
+        objects = await self._detect_objects(img)
+        faces, texts = await asyncio.gather(
+            self._find_faces(objects, small_bgr, scale),
+            asyncio.to_thread(self._read_text, objects, small_bgr, scale),
+        )
+        distances = {o["label"]: round(o["distance_cm"] / 100.0, 2) for o in objects}
+        out = {"objects": objects, "texts": texts, "faces": faces, "distances": distances}
+
+        self._cache_store(frame_hash, out)
+        return out
+
+    # --- 1) Object Detection ---
+    async def _detect_objects(self, img):
+        dets = await self._yolo_submit(img)
+        xyxy = dets.boxes.xyxy.cpu().numpy().astype(np.int32)
+        cls_ids = dets.boxes.cls.cpu().numpy().astype(np.int32)
+        confs = dets.boxes.conf.cpu().numpy()
+
+        # Remove overlapping duplicates (same class id == same label)
+        keep = overlap_keep_mask(xyxy, cls_ids)
+        xyxy, cls_ids, confs = xyxy[keep], cls_ids[keep], confs[keep]
+
+        distances_cm = self._estimate_distances(xyxy, cls_ids, img.shape[0])
         objects = []
-        for box, cls, conf in zip(dets.boxes.xyxy, dets.boxes.cls, dets.boxes.conf):
-            x1, y1, x2, y2 = map(int, box.tolist())
-            label = self.yolo.model.names[int(cls)]
+        for box, cls, conf, dist in zip(xyxy.tolist(), cls_ids.tolist(), confs.tolist(), distances_cm.tolist()):
             objects.append({
-                "label": label,
-                "bbox": [x1, y1, x2, y2],
-                "score": round(float(conf), 2),
-                "distance_cm": None
+                "label": self._names[cls],
+                "bbox": box,
+                "score": round(conf, 2),
+                "distance_cm": dist
             })
+        return objects
+
+    async def _yolo_submit(self, img):
+        """
+        Queue a frame for batched YOLO inference and wait for its result.
+        """
+        if self._yolo_task is None or self._yolo_task.done():
+            self._yolo_queue = asyncio.Queue()
+            self._yolo_task = asyncio.create_task(self._yolo_batch_loop())
+        fut = asyncio.get_running_loop().create_future()
+        await self._yolo_queue.put((img, fut))
+        return await fut
+
+    async def _yolo_batch_loop(self):
+        """
+        Collect up to YOLO_BATCH_SIZE frames (or whatever arrives within
+        YOLO_BATCH_WAIT_S of the first one) and run them as one YOLO call.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._yolo_queue.get()]
+            deadline = loop.time() + self.YOLO_BATCH_WAIT_S
+            while len(batch) < self.YOLO_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._yolo_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
-        # Remove overlapping duplicates
-        objects = self.remove_overlapping_objects(objects)
-        out["objects"] = objects
+            try:
+                results = await asyncio.to_thread(self._run_yolo, [img for img, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
 
-        # --- 2) OCR (EasyOCR) ---
-        ocr_results = self.ocr.readtext(np.array(pil_img), detail=0)  # returns only text
-        out["texts"] = ocr_results
+            for (_, fut), dets in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(dets)
 
-        # --- 3) Face Detection (Haar Cascade) ---
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        detected_faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-        faces_list = [{"bbox": [int(x), int(y), int(x + w), int(y + h)], "status": "unknown"} 
-                      for (x, y, w, h) in detected_faces]
-        out["faces"] = faces_list
+    def _run_yolo(self, imgs):
+        # Ultralytics letterboxes each frame, so differently sized frames can share a batch
+        with self._yolo_lock:
+            return self.yolo(imgs, imgsz=640, half=self.use_half, device=self.device, verbose=False)
 
-# ----------------------------------------------------
-        # --- 4) Distance Estimation --- according to the formula
-# ----------------------------------------------------
-        height_px = img.shape[0]
-        for o in out["objects"]:
-            x1, y1, x2, y2 = o["bbox"]
-            bbox_w = max(1, x2 - x1)
-            bbox_h = max(1, y2 - y1)
-            label = o["label"]
-            distance_cm = None
+    async def _find_faces(self, objects, small_bgr, scale):
+        """
+        Derive faces from YOLO's "person" boxes; Haar only runs as a
+        fallback when no person was detected.
+        """
+        persons = [o for o in objects if o["label"] == "person"]
+        if persons:
+            return self.faces_from_persons(persons)
+        return await asyncio.to_thread(self._detect_faces, small_bgr, scale)
 
-            try:
-                if label in self.KNOWN_WIDTH:
-                    real_w_cm = float(self.KNOWN_WIDTH[label])
-                    distance_cm = round((real_w_cm * self.FOCAL_LENGTH_PX) / float(bbox_w), 1)
-                else:
-                    # Fallback: simple height proxy
-                    proxy = 1.0 / (bbox_h / height_px + 0.1) * 3.0
-                    distance_cm = round(proxy * 100.0, 1)
-            except:
-                proxy = 1.0 / (bbox_h / height_px + 0.1) * 3.0
-                distance_cm = round(proxy * 100.0, 1)
-
-            o["distance_cm"] = distance_cm
-            out["distances"][label] = round(distance_cm / 100.0, 2)
+    @staticmethod
+    def faces_from_persons(persons):
+        """
+        Approximate a face box as the top fifth of each person box.
+        """
+        faces = []
+        for p in persons:
+            x1, y1, x2, y2 = p["bbox"]
+            faces.append({"bbox": [x1, y1, x2, y1 + max(1, (y2 - y1) // 5)], "status": "unknown"})
+        return faces
 
-        return out
+    # --- 2) OCR (EasyOCR) ---
+    def _read_text(self, objects, small_bgr, scale):
+        """
+        OCR the text-bearing object regions, reusing cached text for regions
+        that have not changed. The whole frame is only read when no such
+        region is usable; trade-off: while a book/screen/sign is in view, text
+        elsewhere in the frame is not reported.
+        """
+        regions = [o for o in objects if o["label"] in self.TEXT_LABELS]
+        with self._ocr_lock:
+            texts = []
+            read_any = False
+            height, width = small_bgr.shape[:2]
+            for o in regions:
+                x1, y1, x2, y2 = (int(v * scale) for v in o["bbox"])
+                x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+                crop = small_bgr[y1:y2, x1:x2]
+                if crop.shape[0] < self.OCR_REGION_HASH_SIZE or crop.shape[1] < self.OCR_REGION_HASH_SIZE + 1:
+                    continue
+                texts.extend(self._read_region(o["label"], (x1, y1, x2, y2), crop))
+                read_any = True
+
+            if not read_any:
+                return self.ocr.readtext(self.bgr_to_rgb(small_bgr), detail=0)  # returns only text
+            return texts
+
+    def _read_region(self, label, box, crop):
+        """
+        OCR a single region crop through the per-region cache.
+        Callers must hold self._ocr_lock.
+        """
+        grid = self.OCR_REGION_GRID_PX
+        key = (label,) + tuple(v // grid for v in box)
+        region_hash = dhash(crop, self.OCR_REGION_HASH_SIZE)
+        now = time.monotonic()
+
+        entry = self._ocr_region_cache.get(key)
+        if (entry is not None
+                and now - entry["time"] <= self.OCR_REGION_MAX_AGE_S
+                and bin(region_hash ^ entry["hash"]).count("1") <= self.OCR_REGION_HASH_MAX_DIST):
+            self._ocr_region_cache.move_to_end(key)
+            return entry["texts"]
+
+        region_texts = self.ocr.readtext(self.bgr_to_rgb(crop), detail=0)
+        self._ocr_region_cache[key] = {"hash": region_hash, "time": now, "texts": region_texts}
+        self._ocr_region_cache.move_to_end(key)
+        while len(self._ocr_region_cache) > self.OCR_REGION_CACHE_SIZE:
+            self._ocr_region_cache.popitem(last=False)
+        return region_texts
+
+    @staticmethod
+    def bgr_to_rgb(img):
+        """
+        Contiguous RGB copy of a BGR frame for EasyOCR. A reversed-stride view
+        ([:, :, ::-1]) looks free but gets copied again by every OpenCV call
+        EasyOCR makes on it (grayscale, resize), so convert once up front.
+        """
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    # --- 3) Face Detection (Haar Cascade) ---
+    def _detect_faces(self, small_bgr, scale):
+        with self._buf_lock:
+            gray = self._to_gray(small_bgr)
+            detected_faces = self.face_cascade.detectMultiScale(
+                gray, scaleFactor=1.2, minNeighbors=4, minSize=(40, 40), flags=cv2.CASCADE_SCALE_IMAGE
+            )
+        # Map boxes from the downsampled frame back to original coordinates
+        return [{"bbox": [int(x / scale), int(y / scale), int((x + w) / scale), int((y + h) / scale)],
+                 "status": "unknown"}
+                for (x, y, w, h) in detected_faces]
+
+    # --- 4) Distance Estimation --- according to the formula
+    def _estimate_distances(self, boxes, cls_ids, height_px):
+        """
+        Distances in cm for (N, 4) xyxy boxes with YOLO class ids.
+        """
+        return estimate_distances(boxes, self._width_by_id[cls_ids], self.FOCAL_LENGTH_PX, height_px)
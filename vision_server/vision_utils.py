@@ -0,0 +1,72 @@
+import numpy as np
+import cv2
+
+
+def dhash(img, size=8):
+    """
+    Compute a size*size-bit difference hash of a BGR (or grayscale) image
+    (64 bits by default). Near-identical frames produce hashes with a small
+    Hamming distance.
+    """
+    small = cv2.resize(img, (size + 1, size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def pairwise_iou(boxes):
+    """
+    Vectorized IoU between every pair of boxes.
+    boxes: (N, 4) float array of [x1, y1, x2, y2]; returns an (N, N) matrix.
+    """
+    xA = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    yA = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    xB = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    yB = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+
+    inter = np.clip(xB - xA, 0, None) * np.clip(yB - yA, 0, None)
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = area[:, None] + area[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def overlap_keep_mask(boxes, labels, threshold=0.5):
+    """
+    Boolean mask of boxes kept by greedy per-label NMS: a box is dropped when it
+    overlaps (IoU > threshold) an earlier kept box with the same label.
+    labels may be label strings or YOLO class ids.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    labels = np.asarray(labels)
+    keep = np.ones(len(boxes), dtype=bool)
+
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        if idx.size < 2:
+            continue
+        overlaps = np.triu(pairwise_iou(boxes[idx]) > threshold, 1)
+        alive = np.ones(idx.size, dtype=bool)
+        for i in range(idx.size):
+            if alive[i]:
+                alive &= ~overlaps[i]
+        keep[idx] = alive
+
+    return keep
+
+
+def estimate_distances(boxes, real_w_cm, focal_length_px, height_px):
+    """
+    Distances in cm for (N, 4) xyxy boxes. real_w_cm holds each object's known
+    real width (NaN when unknown).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    bbox_w = np.maximum(1, boxes[:, 2] - boxes[:, 0])
+    bbox_h = np.maximum(1, boxes[:, 3] - boxes[:, 1])
+
+    # Known width -> pinhole formula; otherwise fall back to a simple height proxy
+    return np.where(
+        np.isnan(real_w_cm),
+        1.0 / (bbox_h / height_px + 0.1) * 300.0,
+        real_w_cm * focal_length_px / bbox_w,
+    ).round(1)